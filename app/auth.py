@@ -0,0 +1,63 @@
+from __future__ import annotations
+import hmac
+from typing import Iterable
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+# Bearer sencillo compartido por mcp_http.py y server_uvicorn.py
+
+# Respuesta de /health precalculada: el middleware la envía sin pasar por el router
+HEALTH_BODY = b'{"status":"ok"}'
+HEALTH_HEADERS = [
+    (b"content-type", b"application/json"),
+    (b"content-length", str(len(HEALTH_BODY)).encode()),
+]
+
+class BearerAuthMiddleware:
+    """
+    Middleware ASGI puro: revisa el header Authorization directamente en el scope,
+    sin envolver cada request en Request/Response ni abrir tareas extra.
+    public_paths: rutas sin auth (cualquier método).
+    health_fast_path: si es True, GET /health se responde aquí sin pasar por el router.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        token: str,
+        public_paths: Iterable[str] = ("/health",),
+        health_fast_path: bool = False,
+    ) -> None:
+        self.app = app
+        # header esperado ya codificado: se compara en tiempo constante, sin decodificar
+        self.expected = ("Bearer " + token).encode()
+        self.public_paths = frozenset(public_paths)
+        self.health_fast_path = health_fast_path
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        if self.health_fast_path and scope["path"] == "/health" and scope["method"] == "GET":
+            await send({"type": "http.response.start", "status": 200, "headers": HEALTH_HEADERS})
+            await send({"type": "http.response.body", "body": HEALTH_BODY})
+            return
+        # Rutas públicas y preflight/HEAD sin auth (evita 401 en OPTIONS/HEAD)
+        if scope["path"] in self.public_paths or scope["method"] in ("OPTIONS", "HEAD"):
+            await self.app(scope, receive, send)
+            return
+
+        auth = b""
+        for name, value in scope["headers"]:
+            if name == b"authorization":
+                auth = value
+                break
+        if not auth.startswith(b"Bearer "):
+            response = JSONResponse({"detail": "Missing Bearer token"}, status_code=401)
+        elif not hmac.compare_digest(auth, self.expected):
+            response = JSONResponse({"detail": "Invalid Bearer token"}, status_code=403)
+        else:
+            await self.app(scope, receive, send)
+            return
+        await response(scope, receive, send)
@@ -23,88 +23,138 @@ Uso:
 """
 
 import argparse
+import logging
 import os
 import sys
 import pandas as pd
-from typing import Optional
-
-
-def read_table(path: str, sheet: Optional[str] = None) -> pd.DataFrame:
+from typing import Dict, Optional
+
+from layer_io import as_str, read_excel_fast, write_output
+
+log = logging.getLogger(__name__)
+
+# Mapea variaciones comunes de nombres de columna a las oficiales
+COLUMN_ALIASES = {
+    "codigo": "code",
+    "code": "code",
+    "descripcion": "description",
+    "description": "description",
+    "valor": "value",
+    "value": "value",
+    "input_cost": "value",
+    "importe": "value",
+    "monto": "value",
+}
+REQUIRED_COLUMNS = ["code", "description", "value"]
+_REQUIRED_SET = frozenset(REQUIRED_COLUMNS)
+
+
+def _is_known_column(col) -> bool:
+    return str(col).lower().strip() in COLUMN_ALIASES
+
+
+def _dtype_for(columns, dtype: Dict[str, str]) -> Dict[str, str]:
+    # claves por nombre tal cual (p.ej. "importe") o por el oficial ("value"), comparadas
+    # como COLUMN_ALIASES: minúsculas y sin espacios en los extremos
+    hints = {str(k).lower().strip(): v for k, v in dtype.items()}
+    out, used = {}, set()
+    for c in columns:
+        key = str(c).lower().strip()
+        official = COLUMN_ALIASES.get(key)
+        if official is None:
+            continue
+        for k in (key, official):
+            if k in hints:
+                out[c] = hints[k]
+                used.add(k)
+                break
+    unused = sorted(set(hints) - used)
+    if unused:
+        log.warning("dtype: claves sin columna reconocida, se ignoran: %s", unused)
+    return out
+
+
+def _read_csv(path: str, dtype: Optional[Dict[str, str]] = None) -> pd.DataFrame:
+    # separador por el encabezado (coma; si no reconoce columnas, punto y coma) y una
+    # sola lectura tipada: sus errores reales de parseo/conversión llegan al llamador
+    for sep in (",", ";"):
+        header = pd.read_csv(path, nrows=0, sep=sep).columns
+        if any(_is_known_column(c) for c in header):
+            break
+    else:
+        header = pd.read_csv(path, nrows=0).columns
+        raise ValueError(f"Ninguna columna reconocida. Presentes: {list(header)}")
+    # code/description como texto, sin inferencia
+    col_types = {c: object for c in header
+                 if COLUMN_ALIASES.get(str(c).lower().strip()) in ("code", "description")}
+    if dtype:
+        col_types.update(_dtype_for(header, dtype))
+    return pd.read_csv(path, sep=sep, usecols=_is_known_column, dtype=col_types)
+
+
+def read_table(path: str, sheet: Optional[str] = None,
+               dtype: Optional[Dict[str, str]] = None) -> pd.DataFrame:
+    """
+    Lee la tabla base (sólo las columnas reconocidas). `dtype` fija tipos por columna
+    (p.ej. {"value": "float64"}) en lugar de inferirlos; sin él, code/description
+    se leen como texto y value se infiere.
+    """
     ext = os.path.splitext(path)[1].lower()
     if ext in [".xls", ".xlsx", ".xlsm", ".xlsb"]:
-        return pd.read_excel(path, sheet_name=sheet)
+        df = read_excel_fast(path, sheet, usecols=_is_known_column, dtype=object)
+        # las celdas de Excel ya vienen tipadas: los hints se aplican tras leer
+        return df.astype(_dtype_for(df.columns, dtype)) if dtype else df
     elif ext in [".csv", ".txt"]:
-        # intenta coma; si falla, punto y coma
-        try:
-            return pd.read_csv(path)
-        except Exception:
-            return pd.read_csv(path, sep=";")
+        return _read_csv(path, dtype)
     else:
         raise ValueError(f"Formato no soportado: {ext}")
 
 
 def normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
-    # normaliza nombres
-    rename_map = {c.lower().strip(): c for c in df.columns}
-    # Mapea variaciones comunes a oficiales
-    aliases = {
-        "codigo": "code",
-        "code": "code",
-        "descripcion": "description",
-        "description": "description",
-        "valor": "value",
-        "value": "value",
-        "input_cost": "value",
-        "importe": "value",
-        "monto": "value",
-    }
+    # caso común: ya trae los nombres oficiales
+    if _REQUIRED_SET.issubset(df.columns):
+        return df.loc[:, REQUIRED_COLUMNS]
     # Construye nuevo dict de renombres
     newcols = {}
     for c in df.columns:
         key = c.lower().strip()
-        if key in aliases:
-            newcols[c] = aliases[key]
+        if key in COLUMN_ALIASES:
+            newcols[c] = COLUMN_ALIASES[key]
     df = df.rename(columns=newcols)
-    required = ["code", "description", "value"]
-    missing = [c for c in required if c not in df.columns]
+    missing = [c for c in REQUIRED_COLUMNS if c not in df.columns]
     if missing:
         raise ValueError(
             f"Faltan columnas requeridas: {missing}. Presentes: {list(df.columns)}")
-    return df[required].copy()
+    return df[REQUIRED_COLUMNS].copy()
 
 
 def build_layer(df_in: pd.DataFrame, parent: str, pad: int = 2,
                 include_parent_row: bool = True, parent_name: Optional[str] = None) -> pd.DataFrame:
-    out_rows = []
+    columns = ["parent", "symbol", "name", "input_cost"]
+    # limpia y arma símbolos (vectorizado, sin recorrer filas)
+    codes = as_str(df_in["code"])
+    # intento forzar a entero para pad, pero si trae letras se respeta
+    nums = pd.to_numeric(codes, errors="coerce")
+    is_num = nums.notna() & (nums.abs() < 2 ** 63)
+    padded = nums.where(is_num, 0).astype("int64").astype(str).str.zfill(pad)
+    # si no es número, no se rellena con ceros
+    code_str = padded.where(is_num, codes)
+    df_out = pd.DataFrame(
+        {
+            "parent": parent,
+            "symbol": (parent + "." + code_str).to_numpy(),
+            "name": as_str(df_in["description"]).to_numpy(),
+            "input_cost": df_in["value"].to_numpy(),
+        },
+        columns=columns,
+    )
     if include_parent_row:
-        out_rows.append(
-            {
-                "parent": parent,
-                "symbol": parent,
-                "name": parent_name if parent_name is not None else "",
-                "input_cost": ""
-            }
-        )
-    # limpia y arma símbolos
-    for _, row in df_in.iterrows():
-        code = str(row["code"]).strip()
-        # intento forzar a entero para pad, pero si trae letras se respeta
-        try:
-            code_int = int(float(code))
-            code_str = str(code_int).zfill(pad)
-        except Exception:
-            # si no es número, no se rellena con ceros
-            code_str = code
-        symbol = f"{parent}.{code_str}"
-        out_rows.append(
-            {
-                "parent": parent,
-                "symbol": symbol,
-                "name": str(row["description"]).strip(),
-                "input_cost": row["value"],
-            }
+        head = pd.DataFrame(
+            [[parent, parent, parent_name if parent_name is not None else "", ""]],
+            columns=columns,
         )
-    return pd.DataFrame(out_rows, columns=["parent", "symbol", "name", "input_cost"])
+        df_out = pd.concat([head, df_out], ignore_index=True)
+    return df_out
 
 
 def main():
@@ -114,7 +164,7 @@ def main():
                     help="Ruta del archivo de entrada (CSV/XLSX).")
     ap.add_argument("--sheet", help="Nombre de hoja si el input es Excel.")
     ap.add_argument("--output", "-o", required=True,
-                    help="Ruta del Excel de salida (e.g., salida.xlsx).")
+                    help="Ruta de salida: .xlsx, .parquet o .csv (e.g., salida.xlsx).")
     ap.add_argument("--sheet-name", default="Resultados",
                     help="Nombre de hoja en el Excel de salida.")
     ap.add_argument("--parent", required=True,
@@ -126,6 +176,7 @@ def main():
     ap.add_argument("--pad", type=int, default=2,
                     help="Relleno con ceros para el code (por defecto 2 -> 43 -> '43').")
     args = ap.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
 
     try:
         df_raw = read_table(args.input, args.sheet)
@@ -137,12 +188,11 @@ def main():
             include_parent_row=not args.no_parent_row,
             parent_name=args.parent_name
         )
-        # exporta a Excel
-        with pd.ExcelWriter(args.output, engine="openpyxl") as xls:
-            df_out.to_excel(xls, index=False, sheet_name=args.sheet_name)
-        print(f"✅ Archivo generado: {args.output} (hoja: {args.sheet_name})")
+        # exporta según la extensión de salida (.xlsx, .parquet o .csv)
+        write_output(df_out, args.output, args.sheet_name)
+        log.info("✅ Archivo generado: %s (hoja: %s)", args.output, args.sheet_name)
     except Exception as e:
-        print(f"❌ Error: {e}", file=sys.stderr)
+        log.error("❌ Error: %s", e)
         sys.exit(1)
 
 
@@ -13,20 +13,27 @@ Genera la capa 20 = Personal con jerarquía Roles → Empleados.
 
 from __future__ import annotations
 import pandas as pd
-import argparse, os, sys, re
+import argparse, logging, os, sys, re
 from typing import Optional
 
+from layer_io import as_str, read_excel_fast, write_output
+
+_WS = re.compile(r"\s+")
+_NONALNUM = re.compile(r"[^0-9A-Za-z]")
+
+log = logging.getLogger(__name__)
+
 def read_any(path: str, sheet: Optional[str] = None) -> pd.DataFrame:
     ext = os.path.splitext(path)[1].lower()
     if ext in (".xlsx", ".xls", ".xlsm", ".xlsb"):
-        return pd.read_excel(path, sheet_name=(0 if sheet is None else sheet))
+        return read_excel_fast(path, sheet)
     try:
         return pd.read_csv(path)
     except Exception:
         return pd.read_csv(path, sep=";")
 
 def norm_cols(df: pd.DataFrame) -> list[str]:
-    return [re.sub(r'\s+', ' ', c.strip().lower()) for c in df.columns]
+    return [_WS.sub(" ", c.strip().lower()) for c in df.columns]
 
 def load_roles(path: str, sheet: Optional[str]) -> pd.DataFrame:
     df = read_any(path, sheet)
@@ -44,28 +51,27 @@ def load_roles(path: str, sheet: Optional[str]) -> pd.DataFrame:
     df["code"] = df["code"].astype(str).str.strip()
     df["role"] = df["role"].astype(str).str.strip()
     df["_role_key"] = df["role"].str.lower()
-    df["_code_key"] = df["code"].str.replace(r"[^0-9A-Za-z]", "", regex=True)
+    df["_code_key"] = df["code"].str.replace(_NONALNUM, "", regex=True)
     return df[["code","role","_role_key","_code_key"]]
 
+_EMP_ALIASES = {
+    "nombre":"name",
+    "empleado":"name",
+    "costo":"cost",
+    "valor":"cost",
+    "salario":"cost",
+}
+
 def load_emps(path: str, sheet: Optional[str]) -> pd.DataFrame:
     df = read_any(path, sheet)
     df.columns = norm_cols(df)
-    df = df.rename(columns={
-        "nombre":"name",
-        "empleado":"name",
-        "costo":"cost",
-        "valor":"cost",
-        "salario":"cost",
-    })
-    # preferir 'name'/'cost'
-    if "name" not in df.columns and "name" in [c.capitalize() for c in df.columns]:
-        df = df.rename(columns={"name":"name"})
-    if "cost" not in df.columns and "cost" in [c.capitalize() for c in df.columns]:
-        df = df.rename(columns={"cost":"cost"})
+    # norm_cols ya dejó los nombres en minúsculas: un solo rename
+    renames = {c: _EMP_ALIASES[c] for c in df.columns if c in _EMP_ALIASES}
     # rol por nombre o código
     # admitimos 'role' (texto) y 'cargo' (código)
     if "role" not in df.columns and "rol" in df.columns:
-        df = df.rename(columns={"rol":"role"})
+        renames["rol"] = "role"
+    df = df.rename(columns=renames)
     cols_needed = ["id","name","cost"]
     for c in cols_needed:
         if c not in df.columns:
@@ -75,7 +81,7 @@ def load_emps(path: str, sheet: Optional[str]) -> pd.DataFrame:
     # code key: de 'cargo' si existe; si no, vacío
     cargo_col = "cargo" if "cargo" in df.columns else None
     if cargo_col:
-        df["_code_key"] = df[cargo_col].astype(str).str.strip().str.replace(r"[^0-9A-Za-z]", "", regex=True)
+        df["_code_key"] = df[cargo_col].astype(str).str.strip().str.replace(_NONALNUM, "", regex=True)
     else:
         df["_code_key"] = ""
     return df
@@ -87,11 +93,16 @@ def zpad_keeplen(code: str, min_width: int = 2) -> str:
         return s.zfill(max(min_width, len(s)))
     return s
 
-def build_layer(df_roles: pd.DataFrame, df_emp: pd.DataFrame, parent_code: str = "20") -> pd.DataFrame:
-    out = []
+def zpad_series(codes: pd.Series, min_width: int = 2) -> pd.Series:
+    # versión vectorizada de zpad_keeplen para columnas completas
+    s = as_str(codes)
+    is_num = s.str.fullmatch(r"\d+")
+    return s.str.zfill(min_width).where(is_num, s)
 
+def build_layer(df_roles: pd.DataFrame, df_emp: pd.DataFrame, parent_code: str = "20") -> pd.DataFrame:
     # estrategia de mapeo: 1) por _code_key si empleados lo tienen; 2) si no, por _role_key
     emp_has_code = (df_emp["_code_key"] != "").any()
+    join_col = "_code_key" if emp_has_code else "_role_key"
 
     # ordenar roles por code numérico cuando aplicable
     def sort_key(x):
@@ -99,31 +110,42 @@ def build_layer(df_roles: pd.DataFrame, df_emp: pd.DataFrame, parent_code: str =
             return int(str(x))
         except Exception:
             return x
-    roles_sorted = df_roles.sort_values(by="code", key=lambda s: s.map(sort_key))
-
-    for _, r in roles_sorted.iterrows():
-        code = r["code"]
-        code_key = r["_code_key"]
-        role_key = r["_role_key"]
-        role_name = r["role"]
-
-        role_symbol = f"{parent_code}.{code}"
-        out.append({"parent": parent_code, "symbol": role_symbol, "name": role_name, "input_cost": ""})
-
-        if emp_has_code:
-            emps = df_emp[df_emp["_code_key"] == code_key]
-        else:
-            emps = df_emp[df_emp["_role_key"] == role_key]
+    roles_sorted = df_roles.sort_values(by="code", key=lambda s: s.map(sort_key)).reset_index(drop=True)
+    role_symbol = parent_code + "." + roles_sorted["code"]
+
+    # cabeceras de rol: _order = posición del rol, _emp = -1 para ir antes que sus empleados
+    role_rows = pd.DataFrame({
+        "parent": parent_code,
+        "symbol": role_symbol,
+        "name": roles_sorted["role"],
+        "input_cost": "",
+        "_order": roles_sorted.index,
+        "_emp": -1,
+    })
 
-        for _, e in emps.iterrows():
-            out.append({
-                "parent": role_symbol,
-                "symbol": f"{role_symbol}.{str(e['id']).strip()}",
-                "name": str(e["name"]).strip(),
-                "input_cost": e["cost"],
-            })
+    # un único join roles ↔ empleados en lugar de filtrar df_emp por cada rol
+    left = pd.DataFrame({join_col: roles_sorted[join_col], "_symbol": role_symbol, "_order": roles_sorted.index})
+    right = pd.DataFrame({
+        join_col: df_emp[join_col].to_numpy(),
+        "_id": as_str(df_emp["id"]).to_numpy(),
+        "_name": as_str(df_emp["name"]).to_numpy(),
+        "_cost": df_emp["cost"].to_numpy(),
+        "_emp": range(len(df_emp)),
+    })
+    merged = left.merge(right, on=join_col, how="inner")
+    emp_rows = pd.DataFrame({
+        "parent": merged["_symbol"],
+        # as_str en ambos lados: sin empleados, _id llega vacío con dtype object
+        "symbol": as_str(merged["_symbol"]) + "." + as_str(merged["_id"]),
+        "name": merged["_name"],
+        "input_cost": merged["_cost"],
+        "_order": merged["_order"],
+        "_emp": merged["_emp"],
+    })
 
-    return pd.DataFrame(out, columns=["parent","symbol","name","input_cost"])
+    out = pd.concat([role_rows, emp_rows], ignore_index=True)
+    out = out.sort_values(["_order", "_emp"], kind="mergesort")
+    return out[["parent","symbol","name","input_cost"]].reset_index(drop=True)
 
 def main():
     ap = argparse.ArgumentParser(description="Capa 20 = Personal (Roles → Empleados)")
@@ -133,14 +155,14 @@ def main():
     ap.add_argument("--roles-sheet")
     ap.add_argument("--empleados-sheet")
     args = ap.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
 
     roles = load_roles(args.roles, args.roles_sheet)
     emps  = load_emps(args.empleados, args.empleados_sheet)
     out = build_layer(roles, emps, parent_code="20")
-    with pd.ExcelWriter(args.output, engine="openpyxl") as xls:
-        out.to_excel(xls, index=False, sheet_name="20 Personal")
+    write_output(out, args.output, "20 Personal")
 
-    print(f"OK -> {args.output}")
+    log.info("OK -> %s", args.output)
 
 if __name__ == "__main__":
     main()
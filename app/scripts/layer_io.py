@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+
+"""
+Entrada/salida compartida por los scripts de capas (10 financiera, 20 personal).
+"""
+
+from __future__ import annotations
+import logging
+import os
+from typing import Optional
+
+import pandas as pd
+
+from xlsx_fast import write_df_xlsx
+
+try:
+    import python_calamine  # noqa: F401  (lector Rust, mucho más rápido que openpyxl)
+    EXCEL_READ_ENGINE: Optional[str] = "calamine"
+except ImportError:
+    EXCEL_READ_ENGINE = None
+
+log = logging.getLogger(__name__)
+
+
+def as_str(s: pd.Series) -> pd.Series:
+    # equivale a str(x).strip() por celda (NaN -> "nan"), sin depender del dtype de pandas;
+    # en dtypes con pd.NA ("string", "Int64", ...) el faltante también queda "nan".
+    # Resultado object: astype(str) de NumPy reservaría filas × texto más largo
+    arr = s.to_numpy() if s.dtype == object else s.to_numpy(dtype=object, na_value="nan")
+    return pd.Series([str(x) for x in arr], index=s.index, dtype=object).str.strip()
+
+
+def read_excel_fast(path: str, sheet: Optional[str] = None, **kwargs) -> pd.DataFrame:
+    """
+    pd.read_excel con calamine si está instalado; si calamine no puede abrir el
+    archivo, reintenta con el motor por defecto. Sin hoja indicada usa la primera.
+    """
+    # None devolvería todas las hojas
+    kwargs["sheet_name"] = 0 if sheet is None else sheet
+    if EXCEL_READ_ENGINE is not None:
+        try:
+            return pd.read_excel(path, engine=EXCEL_READ_ENGINE, **kwargs)
+        except Exception as err:
+            log.warning("Lectura con %s falló (%r); se reintenta con el motor por defecto",
+                        EXCEL_READ_ENGINE, err)
+    return pd.read_excel(path, **kwargs)
+
+
+# xlsxwriter sin conversiones implícitas de strings (números/fórmulas/URLs).
+# constant_memory queda fuera: DataFrame.to_excel escribe por columnas y
+# xlsxwriter descartaría las filas ya emitidas.
+XLSXWRITER_OPTIONS = {
+    "strings_to_numbers": False,
+    "strings_to_formulas": False,
+    "strings_to_urls": False,
+    "default_date_format": "yyyy-mm-dd",
+}
+
+
+def write_excel(df: pd.DataFrame, path: str, sheet_name: str, engine: Optional[str] = None) -> None:
+    """
+    Escribe df en una sola hoja. Sin engine genera el XML directamente (xlsx_fast);
+    con engine ("xlsxwriter", "openpyxl") pasa por DataFrame.to_excel.
+    """
+    if engine is None:
+        write_df_xlsx(df, path, sheet_name)
+        return
+    engine_kwargs = {"options": XLSXWRITER_OPTIONS} if engine == "xlsxwriter" else None
+    df.to_excel(path, index=False, sheet_name=sheet_name, engine=engine, engine_kwargs=engine_kwargs)
+
+
+def _parquet_frame(df: pd.DataFrame) -> pd.DataFrame:
+    # parquet exige un tipo por columna. input_cost: el "" de las filas cabecera pasa a
+    # nulo y, si todo lo demás es numérico, la columna se guarda como número
+    out = df.copy()
+    if "input_cost" in out.columns and not pd.api.types.is_numeric_dtype(out["input_cost"]):
+        cost = out["input_cost"].mask(out["input_cost"] == "")
+        nums = pd.to_numeric(cost, errors="coerce")
+        out["input_cost"] = nums if nums.notna().sum() == cost.notna().sum() else cost
+    # el resto de columnas object (y un input_cost realmente mixto) van como texto
+    obj = out.select_dtypes(include="object").columns
+    return out.astype({c: "string" for c in obj})
+
+
+def write_output(df: pd.DataFrame, path: str, sheet_name: str, engine: Optional[str] = None) -> None:
+    """
+    Escribe la capa según la extensión de `path`: .parquet (pyarrow, zstd), .csv,
+    o Excel con write_excel para cualquier otra (sheet_name/engine sólo aplican a Excel).
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".parquet":
+        _parquet_frame(df).to_parquet(path, engine="pyarrow", compression="zstd", index=False)
+    elif ext == ".csv":
+        df.to_csv(path, index=False)
+    else:
+        write_excel(df, path, sheet_name, engine)
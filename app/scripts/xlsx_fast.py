@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+
+"""
+Escritor XLSX mínimo para las capas (una sola hoja, sin estilos por celda).
+
+Genera el XML de la hoja directamente dentro del zip, sin pasar por
+openpyxl ni crear un objeto por celda:
+  - números  -> <c><v>…</v></c>
+  - texto    -> inline string (sin tabla de sharedStrings)
+  - fechas   -> número de serie con formato de fecha
+  - NaN/None/"" -> celda vacía
+"""
+
+from __future__ import annotations
+import datetime as dt
+import math
+import numbers
+import re
+import zipfile
+from xml.sax.saxutils import escape
+
+import numpy as np
+import pandas as pd
+
+_CONTENT_TYPES = (
+    b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    b'<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    b'<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    b'<Default Extension="xml" ContentType="application/xml"/>'
+    b'<Override PartName="/xl/workbook.xml" '
+    b'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    b'<Override PartName="/xl/worksheets/sheet1.xml" '
+    b'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    b'<Override PartName="/xl/styles.xml" '
+    b'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    b'</Types>'
+)
+
+_ROOT_RELS = (
+    b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    b'<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    b'<Relationship Id="rId1" '
+    b'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    b'Target="xl/workbook.xml"/>'
+    b'</Relationships>'
+)
+
+_WORKBOOK_RELS = (
+    b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    b'<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    b'<Relationship Id="rId1" '
+    b'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    b'Target="worksheets/sheet1.xml"/>'
+    b'<Relationship Id="rId2" '
+    b'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+    b'Target="styles.xml"/>'
+    b'</Relationships>'
+)
+
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="{name}" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+
+# estilos: 0 = general, 1 = fecha (numFmt 14), 2 = fecha y hora (numFmt 22)
+_STYLES = (
+    b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    b'<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    b'<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+    b'<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    b'<fill><patternFill patternType="gray125"/></fill></fills>'
+    b'<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    b'<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    b'<cellXfs count="3">'
+    b'<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    b'<xf numFmtId="14" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    b'<xf numFmtId="22" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    b'</cellXfs>'
+    b'<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    b'</styleSheet>'
+)
+
+_SHEET_HEAD = (
+    b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+_SHEET_TAIL = b'</sheetData></worksheet>'
+
+# caracteres de control que XML 1.0 no admite
+_ILLEGAL_XML = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+_INVALID_SHEET_CHARS = re.compile(r"[\[\]:*?/\\]")
+_EXCEL_EPOCH = dt.datetime(1899, 12, 30)
+# filas por bloque: tolist() y un único write al zip por bloque
+_CHUNK_ROWS = 1000
+_ONE_DAY = dt.timedelta(days=1)
+
+
+def _column_letters(n: int) -> list[str]:
+    letters = []
+    for i in range(1, n + 1):
+        s = ""
+        while i:
+            i, rem = divmod(i - 1, 26)
+            s = chr(65 + rem) + s
+        letters.append(s)
+    return letters
+
+
+def _text_cell(ref: str, text: str) -> str:
+    text = escape(_ILLEGAL_XML.sub("", text))
+    space = ' xml:space="preserve"' if text[:1].isspace() or text[-1:].isspace() else ""
+    return f'<c r="{ref}" t="inlineStr"><is><t{space}>{text}</t></is></c>'
+
+
+def _cell(ref: str, value) -> str:
+    if type(value) is str:
+        # "" queda como celda en blanco (igual que openpyxl/xlsxwriter vía to_excel)
+        return _text_cell(ref, value) if value else ""
+    if value is None or value is pd.NA or value is pd.NaT:
+        return ""
+    if isinstance(value, (bool, np.bool_)):
+        return f'<c r="{ref}" t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, numbers.Real):
+        if isinstance(value, numbers.Integral):
+            return f'<c r="{ref}"><v>{int(value)}</v></c>'
+        value = float(value)
+        if math.isnan(value):
+            return ""
+        if math.isinf(value):
+            return _text_cell(ref, "inf" if value > 0 else "-inf")
+        return f'<c r="{ref}"><v>{value!r}</v></c>'
+    if isinstance(value, dt.datetime):
+        serial = (value.replace(tzinfo=None) - _EXCEL_EPOCH) / _ONE_DAY
+        return f'<c r="{ref}" s="2"><v>{serial!r}</v></c>'
+    if isinstance(value, dt.date):
+        serial = (value - _EXCEL_EPOCH.date()).days
+        return f'<c r="{ref}" s="1"><v>{serial}</v></c>'
+    return _text_cell(ref, str(value))
+
+
+def _column_array(s: pd.Series) -> np.ndarray:
+    # fechas/duraciones como Timestamp/Timedelta; lo demás, el array NumPy tal cual
+    if s.dtype.kind in "mM":
+        return s.astype(object).to_numpy()
+    return s.to_numpy()
+
+
+def write_df_xlsx(df: pd.DataFrame, path: str, sheet_name: str) -> None:
+    """Escribe df (encabezado + filas) en la única hoja `sheet_name` de `path`."""
+    if not sheet_name or len(sheet_name) > 31 or _INVALID_SHEET_CHARS.search(sheet_name):
+        raise ValueError(f"Nombre de hoja inválido para Excel: {sheet_name!r}")
+    letters = _column_letters(len(df.columns))
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("[Content_Types].xml", _CONTENT_TYPES)
+        zf.writestr("_rels/.rels", _ROOT_RELS)
+        zf.writestr("xl/workbook.xml", _WORKBOOK.format(name=escape(sheet_name, {'"': "&quot;"})))
+        zf.writestr("xl/_rels/workbook.xml.rels", _WORKBOOK_RELS)
+        zf.writestr("xl/styles.xml", _STYLES)
+        # la hoja se escribe en streaming dentro del zip, fila por fila
+        with zf.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as sheet:
+            sheet.write(_SHEET_HEAD)
+            header = "".join(_text_cell(f"{col}1", str(name)) for col, name in zip(letters, df.columns))
+            sheet.write(f'<row r="1">{header}</row>'.encode())
+            # arrays por columna (sin Series ni namedtuple por fila); tolist() por bloque
+            # convierte a float/int de Python en C, más baratos de formatear
+            arrays = [_column_array(df[c]) for c in df.columns]
+            cell, join, write = _cell, "".join, sheet.write
+            r = 1
+            for start in range(0, len(df), _CHUNK_ROWS):
+                chunk = [a[start:start + _CHUNK_ROWS].tolist() for a in arrays]
+                # el bloque entero se une en un solo fragmento: un write por bloque, no por fila
+                rows = []
+                for row in zip(*chunk):
+                    r += 1
+                    cells = join([cell(f"{col}{r}", v) for col, v in zip(letters, row)])
+                    rows.append(f'<row r="{r}">{cells}</row>')
+                write(join(rows).encode())
+            sheet.write(_SHEET_TAIL)
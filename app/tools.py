@@ -0,0 +1,206 @@
+from __future__ import annotations
+import asyncio
+import importlib
+import os
+import sys
+import threading
+from functools import lru_cache
+from os.path import isabs, isdir, join, realpath
+from pathlib import Path
+from typing import Optional, Callable, Dict, Any, List, Tuple
+
+from mcp.server.fastmcp import FastMCP
+
+# Tools MCP compartidas por mcp_http.py y server_uvicorn.py: cada servidor crea su
+# FastMCP y las registra con register_tools(mcp). Las tools son async y corren su
+# trabajo bloqueante (pandas, Excel, scandir) en un hilo con asyncio.to_thread.
+
+# --- Carga de scripts del usuario ---
+BASE_DIR = Path(__file__).resolve().parent
+SCRIPTS_DIR = BASE_DIR / "scripts"
+_BASE_DIR_STR = str(BASE_DIR)
+
+# funciones de cada script que usan las tools, resueltas una sola vez
+_SCRIPT_FUNCS = {
+    "build_layer_10_financial": ("read_table", "normalize_columns", "build_layer", "write_output"),
+    "build_layer_20_personal": ("load_roles", "load_emps", "build_layer", "write_output"),
+}
+
+# nombre -> (funciones ligadas, error); se intenta importar una sola vez, en el primer uso,
+# y las llamadas siguientes sólo cuestan un lookup (sin getattr por función)
+_SCRIPT_MODULES: Dict[str, Tuple[Optional[Tuple[Callable[..., Any], ...]], Optional[BaseException]]] = {}
+
+def _script_funcs(name: str) -> Tuple[Callable[..., Any], ...]:
+    cached = _SCRIPT_MODULES.get(name)
+    if cached is None:
+        if str(SCRIPTS_DIR) not in sys.path:
+            sys.path.insert(0, str(SCRIPTS_DIR))
+        try:
+            module = importlib.import_module(name)
+            cached = (tuple(getattr(module, attr) for attr in _SCRIPT_FUNCS[name]), None)
+        except Exception as e:
+            cached = (None, e)
+        _SCRIPT_MODULES[name] = cached
+    funcs, err = cached
+    if funcs is None:
+        raise RuntimeError(f"Módulo {name} no disponible: {err!r}")
+    return funcs
+
+def load_scripts() -> None:
+    """Importa los scripts de capas por adelantado; un fallo queda cacheado para la tool."""
+    for name in _SCRIPT_FUNCS:
+        try:
+            _script_funcs(name)
+        except RuntimeError:
+            pass
+
+@lru_cache(maxsize=1024)
+def _resolve(rel: str) -> str:
+    # realpath sobre str (sin Path); los clientes MCP suelen repetir las mismas rutas
+    return realpath(rel if isabs(rel) else join(_BASE_DIR_STR, rel))
+
+# Escrituras de Excel concurrentes (CPU + disco): como mucho una por CPU
+_WRITE_SLOTS = threading.BoundedSemaphore(os.cpu_count() or 1)
+
+def _run_fin(
+    input_path: str,
+    output_path: str,
+    parent: str,
+    sheet: Optional[str],
+    sheet_name: str,
+    parent_name: str,
+    no_parent_row: bool,
+    pad: int,
+    engine: Optional[str],
+    dtype_hints: Optional[Dict[str, str]],
+) -> Dict[str, Any]:
+    read_table, normalize_columns, build_layer, write_output = _script_funcs("build_layer_10_financial")
+    df_raw = read_table(input_path, sheet, dtype=dtype_hints)
+    df_norm = normalize_columns(df_raw)
+    df_out = build_layer(
+        df_norm,
+        parent=parent,
+        pad=pad,
+        include_parent_row=(not no_parent_row),
+        parent_name=parent_name,
+    )
+    with _WRITE_SLOTS:
+        write_output(df_out, output_path, sheet_name, engine)
+    return {"ok": True, "output": output_path, "rows": int(len(df_out))}
+
+async def build_layer_10_financial(
+    input_path: str,
+    output_path: str,
+    parent: str,
+    sheet: Optional[str] = None,
+    sheet_name: str = "Resultados",
+    parent_name: str = "Datos que fluyen",
+    no_parent_row: bool = False,
+    pad: int = 2,
+    engine: Optional[str] = None,
+    dtype_hints: Optional[Dict[str, str]] = None,
+) -> Dict[str, Any]:
+    """
+    Genera la capa 10 (financiera). Requisitos de columnas: code, description, value.
+    output_path: .xlsx (por defecto), .parquet (pyarrow, zstd) o .csv según la extensión.
+    engine: None (por defecto) genera el XLSX directamente (XML en streaming);
+    "xlsxwriter" u "openpyxl" pasan por DataFrame.to_excel con ese motor.
+    dtype_hints: tipos por columna de entrada, por nombre tal cual u oficial (sin
+    distinguir mayúsculas), para no inferirlos; p.ej. {"codigo": "string", "importe": "float64"}
+    si el importe es siempre numérico. Claves sin columna se ignoran con un aviso en el log.
+    Sin hints, code/description se leen como texto.
+    """
+    return await asyncio.to_thread(
+        _run_fin, input_path, output_path, parent, sheet,
+        sheet_name, parent_name, no_parent_row, pad, engine, dtype_hints,
+    )
+
+def _run_per(
+    roles_path: str,
+    empleados_path: str,
+    output_path: str,
+    roles_sheet: Optional[str],
+    empleados_sheet: Optional[str],
+    engine: Optional[str],
+) -> Dict[str, Any]:
+    load_roles, load_emps, build_layer, write_output = _script_funcs("build_layer_20_personal")
+    roles = load_roles(roles_path, roles_sheet)
+    emps  = load_emps(empleados_path, empleados_sheet)
+    out   = build_layer(roles, emps, parent_code="20")
+    with _WRITE_SLOTS:
+        write_output(out, output_path, "20 Personal", engine)
+    return {"ok": True, "output": output_path, "rows": int(len(out))}
+
+async def build_layer_20_personal(
+    roles_path: str,
+    empleados_path: str,
+    output_path: str,
+    roles_sheet: Optional[str] = None,
+    empleados_sheet: Optional[str] = None,
+    engine: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Genera la capa 20 = Personal (Roles → Empleados).
+    output_path: .xlsx (por defecto), .parquet (pyarrow, zstd) o .csv según la extensión.
+    engine: None (por defecto) genera el XLSX directamente (XML en streaming);
+    "xlsxwriter" u "openpyxl" pasan por DataFrame.to_excel con ese motor.
+    """
+    return await asyncio.to_thread(
+        _run_per, roles_path, empleados_path, output_path,
+        roles_sheet, empleados_sheet, engine,
+    )
+
+# ===========
+# Utilidad: listar archivos como TOOL (no resource)
+# ===========
+def _scan_dir(dir_path: str, limit: int) -> Dict[str, Any]:
+    p = _resolve(dir_path)
+    # una ruta relativa no puede salir de BASE_DIR (p.ej. "../../etc")
+    if not isabs(dir_path) and p != _BASE_DIR_STR and not p.startswith(_BASE_DIR_STR + os.sep):
+        return {"directory": p, "items": [], "note": "Ruta relativa fuera del directorio base"}
+    if not isdir(p):
+        return {"directory": p, "items": [], "note": "Directorio no existe o no es carpeta"}
+
+    items: List[Dict[str, Any]] = []
+    # scandir: tipo de entrada y stat cacheados en el DirEntry (menos syscalls)
+    truncated = False
+    with os.scandir(p) as it:
+        for entry in it:
+            # corta al llegar a `limit` (hay al menos una entrada más sin listar)
+            if len(items) >= limit:
+                truncated = True
+                break
+            try:
+                # sin seguir symlinks: un enlace se lista como no-directorio con su propio
+                # tamaño (lstat), sin un stat extra sobre el destino
+                is_dir = entry.is_dir(follow_symlinks=False)
+                size = None if is_dir else entry.stat(follow_symlinks=False).st_size
+            except OSError as e:
+                items.append({
+                    "name": entry.name,
+                    "path": entry.path,
+                    "error": str(e),
+                })
+                continue
+            items.append({
+                "name": entry.name,
+                "path": entry.path,
+                "is_dir": is_dir,
+                "size": size,
+            })
+    return {"directory": p, "items": items, "truncated": truncated}
+
+async def file_list(dir_path: str = ".", limit: int = 10000) -> Dict[str, Any]:
+    """
+    Lista archivos del directorio indicado (relativo a /app/app o absoluto).
+    Ejemplo: file_list(dir_path="/data") si montaste un Volume en /data.
+    Devuelve como máximo `limit` entradas; "truncated" indica si quedaron más.
+    """
+    return await asyncio.to_thread(_scan_dir, dir_path, limit)
+
+TOOLS = (build_layer_10_financial, build_layer_20_personal, file_list)
+
+def register_tools(mcp: FastMCP) -> None:
+    """Registra las tools de este módulo en el servidor `mcp`."""
+    for fn in TOOLS:
+        mcp.tool()(fn)